@@ -1,20 +1,53 @@
 import pandas as pd
 import numpy as np
+import pyarrow.feather as feather
 from pathlib import Path
+from pandas.api.types import infer_dtype
 
 class DataProcessor:
     """Classe para processar os dados reais dos arquivos fornecidos"""
     
+    # Colunas do dataset de avaliações efetivamente usadas nas análises
+    WINE_REVIEW_COLUMNS = ['country', 'points', 'price', 'variety']
+    
+    # Versão dos caches em raw-data/.cache: incrementar ao mudar colunas ou tipos gravados
+    CACHE_VERSION = 1
+    
     def __init__(self, data_path="raw-data"):
         self.data_path = Path(data_path)
+        self.cache_path = self.data_path / ".cache"
         self.wine_reviews = None
         self.embrapa_data = None
+        self._br_mask = None
+        self._br_mask_source = None
+    
+    @staticmethod
+    def _cache_is_fresh(cache_file, source_file):
+        """Cache existe e não é mais antigo que o arquivo de origem (se este existir)"""
+        if not cache_file.exists():
+            return False
+        return not source_file.exists() or cache_file.stat().st_mtime >= source_file.stat().st_mtime
     
     def load_wine_reviews(self):
-        """Carrega dados de avaliações de vinhos"""
+        """Carrega dados de avaliações de vinhos (usa cache Feather quando disponível)"""
         try:
             file_path = self.data_path / "winemag-data-130k-v2.csv"
-            self.wine_reviews = pd.read_csv(file_path)
+            cache_file = self.cache_path / f"winemag.v{self.CACHE_VERSION}.feather"
+            if self._cache_is_fresh(cache_file, file_path):
+                # Arrow IPC mapeado em memória: colunas de largura fixa sem cópia
+                table = feather.read_table(cache_file, memory_map=True)
+                self.wine_reviews = table.to_pandas(split_blocks=True)
+            else:
+                self.wine_reviews = pd.read_csv(file_path, engine='pyarrow',
+                                                usecols=self.WINE_REVIEW_COLUMNS,
+                                                dtype_backend='pyarrow')
+                self.wine_reviews['country'] = self.wine_reviews['country'].astype('category')
+                try:
+                    self.cache_path.mkdir(exist_ok=True)
+                    self.wine_reviews.reset_index(drop=True).to_feather(cache_file)
+                except OSError as e:
+                    # Cache é só otimização: sem ele os dados lidos continuam válidos
+                    print(f"Aviso: não foi possível gravar o cache {cache_file}: {e}")
             print(f"Dados de avaliações carregados: {len(self.wine_reviews)} registros")
             return self.wine_reviews
         except Exception as e:
@@ -22,16 +55,61 @@ class DataProcessor:
             return None
     
     def load_embrapa_data(self):
-        """Carrega dados da Embrapa"""
+        """Carrega dados da Embrapa (usa cache Parquet quando disponível)"""
         try:
             file_path = self.data_path / "embrapa e OIV(Definitiva 2.0).CSV (2).xlsx"
-            self.embrapa_data = pd.read_excel(file_path)
+            cache_file = self.cache_path / f"embrapa.v{self.CACHE_VERSION}.parquet"
+            if self._cache_is_fresh(cache_file, file_path):
+                self.embrapa_data = pd.read_parquet(cache_file)
+            else:
+                try:
+                    # Leitor em Rust, bem mais rápido que o openpyxl
+                    self.embrapa_data = pd.read_excel(file_path, engine='calamine')
+                except ImportError:
+                    # Sem python-calamine: volta ao openpyxl
+                    self.embrapa_data = pd.read_excel(file_path)
+                # Colunas numéricas com textos soltos (ex.: '2,2E+07' em 'quantidade') não são
+                # serializáveis em Parquet: converte só essas para número
+                for col in self.embrapa_data.columns:
+                    column = self.embrapa_data[col]
+                    if infer_dtype(column, skipna=True) not in ('mixed', 'mixed-integer'):
+                        continue
+                    numeric = pd.to_numeric(column.astype(str).str.replace(',', '.', regex=False),
+                                            errors='coerce')
+                    lost = int((numeric.isna() & column.notna()).sum())
+                    if lost:
+                        # Texto de verdade na coluna: preserva tudo como string em vez de virar NaN
+                        print(f"Aviso: coluna '{col}' tem {lost} valores não numéricos; mantida como texto")
+                        self.embrapa_data[col] = column.astype('string')
+                    else:
+                        self.embrapa_data[col] = numeric
+                try:
+                    self.cache_path.mkdir(exist_ok=True)
+                    self.embrapa_data.to_parquet(cache_file, compression='zstd')
+                except OSError as e:
+                    print(f"Aviso: não foi possível gravar o cache {cache_file}: {e}")
             print(f"Dados da Embrapa carregados: {len(self.embrapa_data)} registros")
             return self.embrapa_data
         except Exception as e:
             print(f"Erro ao carregar dados da Embrapa: {e}")
             return None
     
+    def _brazil_mask(self):
+        """Máscara dos vinhos brasileiros, recalculada só quando wine_reviews muda"""
+        if self._br_mask is None or self._br_mask_source is not self.wine_reviews:
+            country = self.wine_reviews['country']
+            if isinstance(country.dtype, pd.CategoricalDtype):
+                # Comparação sobre os códigos inteiros da categoria
+                countries = country.cat.categories
+                if 'Brazil' in countries:
+                    self._br_mask = country.cat.codes.to_numpy() == countries.get_loc('Brazil')
+                else:
+                    self._br_mask = np.zeros(len(country), dtype=bool)
+            else:
+                self._br_mask = (country == 'Brazil').to_numpy(dtype=bool, na_value=False)
+            self._br_mask_source = self.wine_reviews
+        return self._br_mask
+    
     def analyze_wine_reviews(self):
         """Analisa dados de avaliações de vinhos"""
         if self.wine_reviews is None:
@@ -39,14 +117,23 @@ class DataProcessor:
         
         if self.wine_reviews is not None:
             # Filtrar vinhos brasileiros
-            brazilian_wines = self.wine_reviews[self.wine_reviews['country'] == 'Brazil']
+            brazilian_wines = self.wine_reviews.loc[self._brazil_mask(), ['points', 'price', 'variety']]
+            
+            # Uma única leitura por coluna para todas as estatísticas
+            points = brazilian_wines['points'].to_numpy(dtype=float, na_value=np.nan)
+            prices = brazilian_wines['price'].to_numpy(dtype=float, na_value=np.nan)
+            
+            # Sem vinhos brasileiros (ou sem preço) as estatísticas ficam NaN, como no pandas
+            has_points = not np.isnan(points).all()
+            has_prices = not np.isnan(prices).all()
             
             analysis = {
                 'total_reviews': len(brazilian_wines),
-                'avg_points': brazilian_wines['points'].mean(),
-                'avg_price': brazilian_wines['price'].mean(),
-                'price_range': (brazilian_wines['price'].min(), brazilian_wines['price'].max()),
-                'top_varieties': brazilian_wines['variety'].value_counts().head(10)
+                'avg_points': np.nanmean(points) if has_points else np.nan,
+                'avg_price': np.nanmean(prices) if has_prices else np.nan,
+                'price_range': ((np.nanmin(prices), np.nanmax(prices)) if has_prices
+                                else (np.nan, np.nan)),
+                'top_varieties': brazilian_wines['variety'].value_counts(sort=False).nlargest(10)
             }
             
             return analysis
@@ -64,9 +151,10 @@ class DataProcessor:
         if wine_data is not None:
             print(f"Colunas disponíveis: {list(wine_data.columns)}")
             print(f"Países únicos: {wine_data['country'].nunique()}")
-            print(f"Vinhos brasileiros: {len(wine_data[wine_data['country'] == 'Brazil'])}")
+            n_br = int(self._brazil_mask().sum())
+            print(f"Vinhos brasileiros: {n_br}")
             
-            # Análise dos vinhos brasileiros
+            # Análise dos vinhos brasileiros (reaproveita a máscara calculada no carregamento)
             brazilian_analysis = self.analyze_wine_reviews()
             if brazilian_analysis:
                 print("\n🇧🇷 ANÁLISE DOS VINHOS BRASILEIROS:")
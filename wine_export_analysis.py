@@ -1,25 +1,29 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
 # Configuração de estilo
 plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+# Paleta "husl" do seaborn (6 cores) pré-calculada, sem importar o seaborn no módulo
+plt.rcParams['axes.prop_cycle'] = plt.cycler(
+    color=['#f77189', '#bb9832', '#50b131', '#36ada4', '#3ba3ec', '#e866f4'])
+
+# Resolução dos PNGs gerados (150 dpi mantém qualidade de impressão no tamanho dos gráficos)
+SAVE_DPI = 150
 
 class WineExportAnalyzer:
-    def __init__(self):
+    def __init__(self, seed=42):
+        self._rng = np.random.default_rng(seed)
         self.export_data = None
         self.climate_data = None
         self.demographic_data = None
         self.economic_data = None
         self.wine_ratings = None
+        self._yearly_cache = None
+        self._country_cache = None
+        self._analysis_cache = None
         
     def generate_mock_data(self):
         """Gera dados mock para análise"""
@@ -28,223 +32,235 @@ class WineExportAnalyzer:
                     'França', 'Japão', 'China', 'Argentina', 'Paraguai', 'Uruguai']
         
         # Dados de exportação (2009-2023)
-        years = list(range(2009, 2024))
-        export_data = []
-        
-        for year in years:
-            for country in countries:
-                # Simulando crescimento com variações
-                base_volume = np.random.normal(1000000, 200000)  # litros
-                growth_factor = 1 + (year - 2009) * 0.05 + np.random.normal(0, 0.1)
-                volume = max(0, base_volume * growth_factor)
-                
-                # Preço por litro varia por país e ano
-                base_price = np.random.uniform(2.5, 8.0)  # US$ por litro
-                price_factor = 1 + (year - 2009) * 0.03
-                price_per_liter = base_price * price_factor
-                
-                export_data.append({
-                    'ano': year,
-                    'pais_destino': country,
-                    'volume_litros': volume,
-                    'valor_usd': volume * price_per_liter
-                })
-        
-        self.export_data = pd.DataFrame(export_data)
+        years = np.arange(2009, 2024)
+        elapsed = years - 2009
+        # pais_destino categórico: agrupamentos operam sobre códigos int8, não strings
+        country_index = pd.CategoricalIndex(countries, categories=countries)
+        idx = pd.MultiIndex.from_product([years.astype(np.int16), country_index],
+                                         names=['ano', 'pais_destino'])
+        n = len(idx)
+        export_elapsed = np.repeat(elapsed, len(countries))
+        
+        # Simulando crescimento com variações
+        base_volume = self._rng.normal(1000000, 200000, n)  # litros
+        growth_factor = 1 + export_elapsed * 0.05 + self._rng.normal(0, 0.1, n)
+        volume = np.maximum(0, base_volume * growth_factor)
+        
+        # Preço por litro varia por país e ano
+        base_price = self._rng.uniform(2.5, 8.0, n)  # US$ por litro
+        price_factor = 1 + export_elapsed * 0.03
+        price_per_liter = base_price * price_factor
+        
+        # float32 basta para a precisão dos dados simulados e reduz o tráfego de memória
+        self.export_data = pd.DataFrame({
+            'volume_litros': volume.astype(np.float32),
+            'valor_usd': (volume * price_per_liter).astype(np.float32)
+        }, index=idx).reset_index()
+        
+        # Dados anuais indexados por 'ano' para alinhamento direto entre as tabelas
+        n_years = len(years)
+        year_index = pd.Index(years.astype(np.int16), name='ano')
         
         # Dados climáticos do Brasil
-        climate_data = []
-        for year in years:
-            climate_data.append({
-                'ano': year,
-                'temperatura_media': np.random.normal(25, 2),
-                'precipitacao_mm': np.random.normal(1200, 200),
-                'dias_sol': np.random.normal(250, 30)
-            })
-        
-        self.climate_data = pd.DataFrame(climate_data)
+        self.climate_data = pd.DataFrame({
+            'temperatura_media': self._rng.normal(25, 2, n_years).astype(np.float32),
+            'precipitacao_mm': self._rng.normal(1200, 200, n_years).astype(np.float32),
+            'dias_sol': self._rng.normal(250, 30, n_years).astype(np.float32)
+        }, index=year_index)
         
         # Dados demográficos
-        demographic_data = []
-        for year in years:
-            demographic_data.append({
-                'ano': year,
-                'populacao_brasil': 200000000 + (year - 2009) * 2000000,
-                'renda_per_capita': 8000 + (year - 2009) * 200 + np.random.normal(0, 500)
-            })
-        
-        self.demographic_data = pd.DataFrame(demographic_data)
+        self.demographic_data = pd.DataFrame({
+            'populacao_brasil': 200000000 + elapsed * 2000000,
+            'renda_per_capita': (8000 + elapsed * 200
+                                 + self._rng.normal(0, 500, n_years)).astype(np.float32)
+        }, index=year_index)
         
         # Dados econômicos
-        economic_data = []
-        for year in years:
-            economic_data.append({
-                'ano': year,
-                'pib_brasil': 2000000000000 + (year - 2009) * 50000000000,
-                'taxa_cambio_usd_brl': np.random.uniform(1.8, 5.5),
-                'inflacao': np.random.uniform(2, 12)
-            })
-        
-        self.economic_data = pd.DataFrame(economic_data)
+        self.economic_data = pd.DataFrame({
+            'pib_brasil': 2000000000000 + elapsed * 50000000000,
+            'taxa_cambio_usd_brl': self._rng.uniform(1.8, 5.5, n_years).astype(np.float32),
+            'inflacao': self._rng.uniform(2, 12, n_years).astype(np.float32)
+        }, index=year_index)
         
         # Avaliações de vinhos
-        wine_ratings = []
-        for year in years:
-            wine_ratings.append({
-                'ano': year,
-                'pontuacao_media': np.random.uniform(82, 92),
-                'num_avaliacoes': np.random.randint(500, 2000),
-                'preco_medio_garrafa': np.random.uniform(15, 45)
-            })
-        
-        self.wine_ratings = pd.DataFrame(wine_ratings)
+        self.wine_ratings = pd.DataFrame({
+            'pontuacao_media': self._rng.uniform(82, 92, n_years).astype(np.float32),
+            'num_avaliacoes': self._rng.integers(500, 2000, n_years),
+            'preco_medio_garrafa': self._rng.uniform(15, 45, n_years).astype(np.float32)
+        }, index=year_index)
+        
+        # Novos dados invalidam as agregações memorizadas
+        self._yearly_cache = None
+        self._country_cache = None
+        self._analysis_cache = None
     
-    def create_export_evolution_chart(self):
-        """Gráfico de evolução das exportações"""
-        yearly_data = self.export_data.groupby('ano').agg({
-            'volume_litros': 'sum',
-            'valor_usd': 'sum'
-        }).reset_index()
-        
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
-        
-        # Volume
-        ax1.plot(yearly_data['ano'], yearly_data['volume_litros']/1000000, 
-                marker='o', linewidth=3, markersize=8, color='#2E8B57')
-        ax1.set_title('Evolução do Volume de Exportação de Vinhos Brasileiros', 
-                     fontsize=16, fontweight='bold')
-        ax1.set_ylabel('Volume (Milhões de Litros)', fontsize=12)
-        ax1.grid(True, alpha=0.3)
-        
-        # Valor
-        ax2.plot(yearly_data['ano'], yearly_data['valor_usd']/1000000, 
-                marker='s', linewidth=3, markersize=8, color='#8B0000')
-        ax2.set_title('Evolução do Valor das Exportações', fontsize=16, fontweight='bold')
+    @property
+    def yearly_export(self):
+        """Volume e valor exportados por ano (calculado uma vez e memorizado)"""
+        if self._yearly_cache is None:
+            self._aggregate_exports()
+        return self._yearly_cache
+    
+    @property
+    def country_export(self):
+        """Volume e valor exportados por país (calculado uma vez e memorizado)"""
+        if self._country_cache is None:
+            self._aggregate_exports()
+        return self._country_cache
+    
+    def _aggregate_exports(self):
+        """Agrega volume e valor exportados por ano e por país com np.bincount"""
+        volume = self.export_data['volume_litros'].values
+        value = self.export_data['valor_usd'].values
+        
+        self._year_codes, self._years_uniq = pd.factorize(self.export_data['ano'].values, sort=True)
+        countries = self.export_data['pais_destino'].cat
+        self._country_codes, self._countries_uniq = countries.codes.to_numpy(), countries.categories
+        
+        self._yearly_cache = pd.DataFrame({
+            'ano': self._years_uniq,
+            'volume_litros': np.bincount(self._year_codes, weights=volume),
+            'valor_usd': np.bincount(self._year_codes, weights=value)
+        })
+        n_countries = len(self._countries_uniq)
+        self._country_cache = pd.DataFrame({
+            'pais_destino': self._countries_uniq,
+            'volume_litros': np.bincount(self._country_codes, weights=volume, minlength=n_countries),
+            'valor_usd': np.bincount(self._country_codes, weights=value, minlength=n_countries)
+        })
+    
+    def _plot_stacked(self, x, y_vol, y_val, *, filename, titles, hist_styles,
+                      x_proj=None, y_vol_proj=None, y_val_proj=None):
+        """Gráfico 2x1 de volume e valor (em milhões) com eixo x compartilhado"""
+        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10), sharex=True)
+        
+        panels = [
+            (ax1, y_vol, y_vol_proj, titles[0], 'Volume (Milhões de Litros)', hist_styles[0]),
+            (ax2, y_val, y_val_proj, titles[1], 'Valor (Milhões USD)', hist_styles[1])
+        ]
+        for ax, y, y_proj, title, ylabel, style in panels:
+            ax.plot(x, y / 1_000_000, **style)
+            if x_proj is not None:
+                ax.plot(x_proj, y_proj / 1_000_000, 
+                        's--', label='Projeção', linewidth=2, markersize=6, color='red')
+                ax.legend()
+            ax.set_title(title, fontsize=16, fontweight='bold')
+            ax.set_ylabel(ylabel, fontsize=12)
+            ax.grid(True, alpha=0.3)
         ax2.set_xlabel('Ano', fontsize=12)
-        ax2.set_ylabel('Valor (Milhões USD)', fontsize=12)
-        ax2.grid(True, alpha=0.3)
         
         plt.tight_layout()
-        plt.savefig('evolucao_exportacoes.png', dpi=300, bbox_inches='tight')
+        fig.savefig(filename, dpi=SAVE_DPI, bbox_inches='tight')
         plt.show()
+        plt.close(fig)
+    
+    def create_export_evolution_chart(self):
+        """Gráfico de evolução das exportações"""
+        yearly_data = self.yearly_export
+        
+        self._plot_stacked(
+            yearly_data['ano'].to_numpy(),
+            yearly_data['volume_litros'].to_numpy(),
+            yearly_data['valor_usd'].to_numpy(),
+            filename='evolucao_exportacoes.png',
+            titles=('Evolução do Volume de Exportação de Vinhos Brasileiros',
+                    'Evolução do Valor das Exportações'),
+            hist_styles=(
+                dict(marker='o', linewidth=3, markersize=8, color='#2E8B57'),
+                dict(marker='s', linewidth=3, markersize=8, color='#8B0000')
+            )
+        )
     
     def create_country_analysis(self):
         """Análise por país de destino"""
-        country_data = self.export_data.groupby('pais_destino').agg({
-            'volume_litros': 'sum',
-            'valor_usd': 'sum'
-        }).reset_index()
-        
-        country_data = country_data.sort_values('valor_usd', ascending=False)
+        country_data = self.country_export.sort_values('valor_usd', ascending=False)
         
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
         
+        # Top 8 países (fatia compartilhada pelos dois painéis)
+        top_countries = country_data.head(8)
+        names = top_countries['pais_destino'].to_numpy()
+        positions = np.arange(len(top_countries))
+        
         # Top países por volume
-        top_countries_vol = country_data.head(8)
-        bars1 = ax1.bar(range(len(top_countries_vol)), 
-                        top_countries_vol['volume_litros']/1000000,
-                        color=plt.cm.Set3(np.linspace(0, 1, len(top_countries_vol))))
+        bars1 = ax1.bar(positions, top_countries['volume_litros'].to_numpy() / 1_000_000,
+                        color=plt.cm.Set3(np.linspace(0, 1, len(positions))))
         ax1.set_title('Top Países por Volume (2009-2023)', fontsize=14, fontweight='bold')
         ax1.set_ylabel('Volume (Milhões de Litros)', fontsize=12)
-        ax1.set_xticks(range(len(top_countries_vol)))
-        ax1.set_xticklabels(top_countries_vol['pais_destino'], rotation=45, ha='right')
+        ax1.set_xticks(positions)
+        ax1.set_xticklabels(names, rotation=45, ha='right')
         
         # Top países por valor
-        top_countries_val = country_data.head(8)
-        bars2 = ax2.bar(range(len(top_countries_val)), 
-                        top_countries_val['valor_usd']/1000000,
-                        color=plt.cm.Set2(np.linspace(0, 1, len(top_countries_val))))
+        bars2 = ax2.bar(positions, top_countries['valor_usd'].to_numpy() / 1_000_000,
+                        color=plt.cm.Set2(np.linspace(0, 1, len(positions))))
         ax2.set_title('Top Países por Valor (2009-2023)', fontsize=14, fontweight='bold')
         ax2.set_ylabel('Valor (Milhões USD)', fontsize=12)
-        ax2.set_xticks(range(len(top_countries_val)))
-        ax2.set_xticklabels(top_countries_val['pais_destino'], rotation=45, ha='right')
+        ax2.set_xticks(positions)
+        ax2.set_xticklabels(names, rotation=45, ha='right')
         
         plt.tight_layout()
-        plt.savefig('analise_paises.png', dpi=300, bbox_inches='tight')
+        fig.savefig('analise_paises.png', dpi=SAVE_DPI, bbox_inches='tight')
         plt.show()
+        plt.close(fig)
     
     def create_correlation_analysis(self):
         """Análise de correlação com fatores externos"""
-        # Consolidar dados por ano
-        yearly_export = self.export_data.groupby('ano').agg({
-            'volume_litros': 'sum',
-            'valor_usd': 'sum'
-        }).reset_index()
+        import seaborn as sns  # usado somente no heatmap
         
-        # Merge com outros dados
-        analysis_data = yearly_export.merge(self.climate_data, on='ano')
-        analysis_data = analysis_data.merge(self.economic_data, on='ano')
-        analysis_data = analysis_data.merge(self.wine_ratings, on='ano')
+        # Consolidar dados por ano e cruzar com os fatores externos (estáticos na execução)
+        if self._analysis_cache is None:
+            yearly = self.yearly_export.set_index('ano')
+            self._analysis_cache = yearly.join(
+                [self.climate_data, self.economic_data, self.wine_ratings]
+            ).reset_index()
+        analysis_data = self._analysis_cache
         
         # Matriz de correlação
         corr_columns = ['volume_litros', 'valor_usd', 'temperatura_media', 
                        'precipitacao_mm', 'taxa_cambio_usd_brl', 'pontuacao_media']
-        corr_matrix = analysis_data[corr_columns].corr()
+        corr_values = np.corrcoef(analysis_data[corr_columns].to_numpy(), rowvar=False)
+        corr_matrix = pd.DataFrame(corr_values, index=corr_columns, columns=corr_columns)
         
-        plt.figure(figsize=(10, 8))
+        fig = plt.figure(figsize=(10, 8))
         sns.heatmap(corr_matrix, annot=True, cmap='RdYlBu_r', center=0,
                    square=True, fmt='.2f', cbar_kws={'shrink': 0.8})
         plt.title('Matriz de Correlação: Exportações vs Fatores Externos', 
                  fontsize=16, fontweight='bold')
         plt.tight_layout()
-        plt.savefig('correlacao_fatores.png', dpi=300, bbox_inches='tight')
+        fig.savefig('correlacao_fatores.png', dpi=SAVE_DPI, bbox_inches='tight')
         plt.show()
+        plt.close(fig)
         
         return analysis_data
     
     def create_future_projections(self, analysis_data):
         """Projeções futuras"""
-        from sklearn.linear_model import LinearRegression
-        from sklearn.preprocessing import PolynomialFeatures
-        
         # Preparar dados para projeção
-        X = analysis_data[['ano']].values
-        y_volume = analysis_data['volume_litros'].values
-        y_value = analysis_data['valor_usd'].values
-        
-        # Modelo de regressão polinomial
-        poly_features = PolynomialFeatures(degree=2)
-        X_poly = poly_features.fit_transform(X)
+        years = analysis_data['ano'].to_numpy()
+        y_volume = analysis_data['volume_litros'].to_numpy()
+        y_value = analysis_data['valor_usd'].to_numpy()
         
-        model_volume = LinearRegression().fit(X_poly, y_volume)
-        model_value = LinearRegression().fit(X_poly, y_value)
+        # Regressão polinomial de grau 2 (mínimos quadrados direto no NumPy)
+        coef_volume = np.polyfit(years, y_volume, 2)
+        coef_value = np.polyfit(years, y_value, 2)
         
         # Projeções para 2024-2028
-        future_years = np.array([[year] for year in range(2024, 2029)])
-        future_years_poly = poly_features.transform(future_years)
+        future_years = np.arange(2024, 2029)
         
-        projected_volume = model_volume.predict(future_years_poly)
-        projected_value = model_value.predict(future_years_poly)
+        projected_volume = np.polyval(coef_volume, future_years)
+        projected_value = np.polyval(coef_value, future_years)
         
         # Visualização
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
-        
-        # Volume
-        ax1.plot(analysis_data['ano'], analysis_data['volume_litros']/1000000, 
-                'o-', label='Dados Históricos', linewidth=2, markersize=6)
-        ax1.plot(range(2024, 2029), projected_volume/1000000, 
-                's--', label='Projeção', linewidth=2, markersize=6, color='red')
-        ax1.set_title('Projeção de Volume de Exportação (2024-2028)', 
-                     fontsize=16, fontweight='bold')
-        ax1.set_ylabel('Volume (Milhões de Litros)', fontsize=12)
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-        
-        # Valor
-        ax2.plot(analysis_data['ano'], analysis_data['valor_usd']/1000000, 
-                'o-', label='Dados Históricos', linewidth=2, markersize=6)
-        ax2.plot(range(2024, 2029), projected_value/1000000, 
-                's--', label='Projeção', linewidth=2, markersize=6, color='red')
-        ax2.set_title('Projeção de Valor das Exportações (2024-2028)', 
-                     fontsize=16, fontweight='bold')
-        ax2.set_xlabel('Ano', fontsize=12)
-        ax2.set_ylabel('Valor (Milhões USD)', fontsize=12)
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        plt.savefig('projecoes_futuras.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        historical = dict(marker='o', linestyle='-', label='Dados Históricos', 
+                          linewidth=2, markersize=6)
+        self._plot_stacked(
+            years, y_volume, y_value,
+            filename='projecoes_futuras.png',
+            titles=('Projeção de Volume de Exportação (2024-2028)',
+                    'Projeção de Valor das Exportações (2024-2028)'),
+            hist_styles=(historical, historical),
+            x_proj=future_years, y_vol_proj=projected_volume, y_val_proj=projected_value
+        )
         
         return projected_volume, projected_value
     
@@ -254,10 +270,10 @@ class WineExportAnalyzer:
         total_value_15y = analysis_data['valor_usd'].sum() / 1000000  # Milhões USD
         avg_price_per_liter = total_value_15y / total_volume_15y
         
-        growth_rate_volume = ((analysis_data['volume_litros'].iloc[-1] / 
-                              analysis_data['volume_litros'].iloc[0]) ** (1/14) - 1) * 100
-        growth_rate_value = ((analysis_data['valor_usd'].iloc[-1] / 
-                             analysis_data['valor_usd'].iloc[0]) ** (1/14) - 1) * 100
+        # Primeiro e último ano de volume e valor em um único slice 2x2
+        first_last = analysis_data[['volume_litros', 'valor_usd']].to_numpy()[[0, -1]]
+        growth = (first_last[1] / first_last[0]) ** (1/14) - 1
+        growth_rate_volume, growth_rate_value = growth * 100
         
         print("=" * 80)
         print("RELATÓRIO EXECUTIVO - EXPORTAÇÕES DE VINHO BRASILEIRO (2009-2023)")
@@ -270,8 +286,14 @@ class WineExportAnalyzer:
         print(f"• Taxa de crescimento anual (valor): {growth_rate_value:.1f}%")
         
         print(f"\n🎯 PRINCIPAIS MERCADOS:")
-        top_markets = self.export_data.groupby('pais_destino')['valor_usd'].sum().sort_values(ascending=False).head(5)
-        for i, (country, value) in enumerate(top_markets.items(), 1):
+        # Reaproveita a agregação por país e seleciona os 5 maiores sem ordenação completa
+        country_export = self.country_export
+        val_by_country = country_export['valor_usd'].to_numpy()
+        k = min(5, len(val_by_country))
+        top5_idx = np.argpartition(-val_by_country, k - 1)[:k]
+        top5_idx = top5_idx[np.argsort(-val_by_country[top5_idx])]
+        top_countries = country_export['pais_destino'].to_numpy()[top5_idx]
+        for i, (country, value) in enumerate(zip(top_countries, val_by_country[top5_idx]), 1):
             print(f"{i}. {country}: US$ {value/1000000:.1f} milhões")
         
         print(f"\n🔮 PROJEÇÕES 2024-2028:")
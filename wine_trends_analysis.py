@@ -1,5 +1,7 @@
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # só gera PNGs: backend sem GUI, sem loop de eventos
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
@@ -7,17 +9,80 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from pandas.api.types import union_categoricals
 warnings.filterwarnings('ignore')
 
+# Resolução dos PNGs gerados (150 dpi é indistinguível de 300 na tela e codifica 4x menos pixels)
+SAVE_DPI = 150
+
+# Apenas as colunas usadas nas análises, já com tipos compactos
+REVIEW_COLUMNS = ['country', 'points', 'price', 'variety', 'title']
+REVIEW_DTYPES = {
+    'country': 'category',
+    'variety': 'category',
+    'points': 'int16',
+    'price': 'float32',
+    'title': 'string'
+}
+
+# Versão do cache Parquet: incrementar ao mudar REVIEW_COLUMNS ou REVIEW_DTYPES
+CACHE_VERSION = 1
+
+def round_aggregates(df, decimals=2):
+    """Arredonda agregações para exibição, promovendo colunas float32 para float64"""
+    float32_columns = df.select_dtypes(include='float32').columns
+    return df.astype({col: 'float64' for col in float32_columns}).round(decimals)
+
+def bin_categories(values, bins, labels):
+    """Equivalente vetorizado de pd.cut (intervalos fechados à direita) via np.searchsorted"""
+    values = np.asarray(values)
+    bins = np.asarray(bins, dtype=np.result_type(values.dtype, np.float32))
+    codes = np.searchsorted(bins, values, side='left') - 1
+    # Fora dos limites ou NaN vira NaN, como no pd.cut
+    codes[(values <= bins[0]) | (values > bins[-1]) | np.isnan(values)] = -1
+    return pd.Categorical.from_codes(codes.astype('int8'), categories=labels, ordered=True)
+
+def read_reviews_csv(path, chunksize=50_000):
+    """Lê o CSV de avaliações em blocos já tipados, sem materializar o arquivo bruto"""
+    chunks = list(pd.read_csv(path, usecols=REVIEW_COLUMNS, dtype=REVIEW_DTYPES,
+                              chunksize=chunksize))
+    frame = pd.concat(chunks, ignore_index=True)
+    # Cada bloco tem suas próprias categorias: unifica para não cair em dtype object
+    for col, dtype in REVIEW_DTYPES.items():
+        if dtype == 'category':
+            frame[col] = union_categoricals([chunk[col] for chunk in chunks],
+                                            sort_categories=True)
+    return frame
+
 class WineTrendsAnalyzer:
     def __init__(self):
         self.wine_data = None
         self.brazilian_wines = None
+        self._country_counts = None
+        self._variety_counts = None
+        self._by_country = None
         
     def load_data(self):
         """Carrega dados de avaliações de vinhos"""
+        csv_path = Path('raw-data/winemag-data-130k-v2.csv')
+        # Mesmo diretório de cache usado pelo DataProcessor
+        cache_path = csv_path.parent / '.cache' / f'winemag-trends.v{CACHE_VERSION}.parquet'
         try:
-            self.wine_data = pd.read_csv('raw-data/winemag-data-130k-v2.csv')
+            # Reconstrói o cache quando o CSV é mais novo que ele
+            if cache_path.exists() and (not csv_path.exists() or
+                                        cache_path.stat().st_mtime >= csv_path.stat().st_mtime):
+                self.wine_data = pd.read_parquet(cache_path, columns=REVIEW_COLUMNS)
+            else:
+                # Primeira execução: converte o CSV em Parquet para evitar o parse nas próximas
+                self.wine_data = read_reviews_csv(csv_path)
+                try:
+                    cache_path.parent.mkdir(exist_ok=True)
+                    self.wine_data.to_parquet(cache_path, compression='zstd')
+                except OSError as e:
+                    # Cache é só otimização: segue com os dados já lidos
+                    print(f"⚠️ Não foi possível gravar o cache {cache_path}: {e}")
             print(f"✅ Dataset carregado: {len(self.wine_data):,} avaliações de vinhos")
             
             # Filtrar vinhos brasileiros
@@ -36,9 +101,17 @@ class WineTrendsAnalyzer:
         # Remover valores nulos em colunas importantes
         self.wine_data = self.wine_data.dropna(subset=['points', 'price'])
         
+        # Tipos estreitos (pontuação 80-100 cabe em int16) reduzem o tráfego de memória;
+        # país e variedade como categorias viram códigos inteiros em groupby/value_counts/isin
+        self.wine_data = self.wine_data.astype({
+            'points': 'int16',
+            'price': 'float32',
+            'country': 'category',
+            'variety': 'category'
+        })
+        
         # Filtrar preços extremos (outliers)
-        Q1 = self.wine_data['price'].quantile(0.25)
-        Q3 = self.wine_data['price'].quantile(0.75)
+        Q1, Q3 = np.quantile(self.wine_data['price'].to_numpy(), [0.25, 0.75])
         IQR = Q3 - Q1
         lower_bound = Q1 - 1.5 * IQR
         upper_bound = Q3 + 1.5 * IQR
@@ -49,39 +122,84 @@ class WineTrendsAnalyzer:
         ]
         
         # Criar categorias de preço
-        self.wine_data['price_category'] = pd.cut(
-            self.wine_data['price'], 
+        self.wine_data['price_category'] = bin_categories(
+            self.wine_data['price'].to_numpy(), 
             bins=[0, 15, 30, 50, 100, float('inf')],
             labels=['Econômico (<$15)', 'Médio ($15-30)', 'Premium ($30-50)', 
                    'Super Premium ($50-100)', 'Ultra Premium (>$100)']
         )
         
         # Criar categorias de pontuação
-        self.wine_data['rating_category'] = pd.cut(
-            self.wine_data['points'],
+        self.wine_data['rating_category'] = bin_categories(
+            self.wine_data['points'].to_numpy(),
             bins=[0, 82, 87, 90, 95, 100],
             labels=['Aceitável (80-82)', 'Bom (83-87)', 'Muito Bom (88-90)', 
                    'Excelente (91-95)', 'Excepcional (96-100)']
         )
         
+        # Cópia privada ordenada por país para os groupby('country') percorrerem fatias
+        # contíguas; self.wine_data mantém a ordem original (desempates dos rankings)
+        self._by_country = self.wine_data[['country', 'points', 'price']].sort_values(
+            'country', kind='stable', ignore_index=True)
+        
+        # Contagens dependem dos dados limpos: invalida o cache
+        self._country_counts = None
+        self._variety_counts = None
+        
         print(f"📊 Dados limpos: {len(self.wine_data):,} registros válidos")
     
-    def analyze_price_quality_relationship(self):
+    @property
+    def country_counts(self):
+        """Quantidade de vinhos por país (calculada uma vez e memorizada)"""
+        if self._country_counts is None:
+            self._country_counts = self.wine_data['country'].value_counts()
+        return self._country_counts
+    
+    @property
+    def variety_counts(self):
+        """Quantidade de vinhos por variedade (calculada uma vez e memorizada)"""
+        if self._variety_counts is None:
+            self._variety_counts = self.wine_data['variety'].value_counts()
+        return self._variety_counts
+    
+    def _compute_price_quality(self):
+        """Agregações da relação preço-qualidade (somente leitura, sem I/O)"""
+        # Correlação preço-pontuação
+        correlation = float(np.corrcoef(self.wine_data['price'].to_numpy(),
+                                        self.wine_data['points'].to_numpy())[0, 1])
+        
+        # Análise por categoria de preço
+        # Um único groupby alimenta a tabela e o gráfico de médias
+        price_stats = self.wine_data.groupby('price_category', observed=True).agg({
+            'points': ['mean', 'std', 'count'],
+            'price': ['mean', 'median']
+        })
+        
+        # Pontuações por categoria para o box plot (mesmas faixas observadas da tabela)
+        groups = [g.to_numpy() for _, g in
+                  self.wine_data.groupby('price_category', observed=True)['points']]
+        
+        return {
+            'correlation': correlation,
+            'price_stats': price_stats,
+            'price_analysis': round_aggregates(price_stats),
+            'groups': groups
+        }
+    
+    def analyze_price_quality_relationship(self, results=None):
         """Analisa relação entre preço e qualidade"""
+        if results is None:
+            results = self._compute_price_quality()
+        correlation = results['correlation']
+        price_stats = results['price_stats']
+        price_analysis = results['price_analysis']
+        
         print("\n" + "="*60)
         print("ANÁLISE: RELAÇÃO PREÇO vs QUALIDADE")
         print("="*60)
         
-        # Correlação preço-pontuação
-        correlation = self.wine_data['price'].corr(self.wine_data['points'])
         print(f"📈 Correlação Preço-Pontuação: {correlation:.3f}")
         
-        # Análise por categoria de preço
-        price_analysis = self.wine_data.groupby('price_category').agg({
-            'points': ['mean', 'std', 'count'],
-            'price': ['mean', 'median']
-        }).round(2)
-        
         print("\n📊 ESTATÍSTICAS POR CATEGORIA DE PREÇO:")
         print(price_analysis)
         
@@ -89,15 +207,20 @@ class WineTrendsAnalyzer:
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
         
         # Scatter plot preço vs pontuação
+        # ~110k pontos: rasteriza a nuvem de pontos em vez de um marcador vetorial por vinho
         ax1.scatter(self.wine_data['price'], self.wine_data['points'], 
-                   alpha=0.5, s=20, color='darkred')
+                   alpha=0.5, s=20, color='darkred', rasterized=True)
         ax1.set_xlabel('Preço (US$)')
         ax1.set_ylabel('Pontuação')
         ax1.set_title('Relação Preço vs Pontuação')
         ax1.grid(True, alpha=0.3)
         
         # Box plot pontuação por categoria de preço
-        self.wine_data.boxplot(column='points', by='price_category', ax=ax2)
+        categories = price_stats.index
+        ax2.boxplot(results['groups'])
+        ax2.set_xticks(range(1, len(categories) + 1))
+        ax2.set_xticklabels(categories)
+        ax2.grid(True, alpha=0.3)
         ax2.set_title('Distribuição de Pontuações por Categoria de Preço')
         ax2.set_xlabel('Categoria de Preço')
         ax2.set_ylabel('Pontuação')
@@ -111,7 +234,7 @@ class WineTrendsAnalyzer:
         ax3.grid(True, alpha=0.3)
         
         # Média de pontuação por categoria de preço
-        avg_points = self.wine_data.groupby('price_category')['points'].mean()
+        avg_points = price_stats[('points', 'mean')]
         bars = ax4.bar(range(len(avg_points)), avg_points.values, 
                       color=plt.cm.RdYlBu_r(np.linspace(0, 1, len(avg_points))))
         ax4.set_xlabel('Categoria de Preço')
@@ -126,29 +249,27 @@ class WineTrendsAnalyzer:
                     f'{value:.1f}', ha='center', va='bottom')
         
         plt.tight_layout()
-        plt.savefig('analise_preco_qualidade.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        fig.savefig('analise_preco_qualidade.png', dpi=SAVE_DPI, bbox_inches='tight')
+        plt.close(fig)
         
         return correlation, price_analysis
     
-    def analyze_variety_trends(self):
-        """Analisa tendências por variedade de uva"""
-        print("\n" + "="*60)
-        print("ANÁLISE: TENDÊNCIAS POR VARIEDADE DE UVA")
-        print("="*60)
-        
+    def _compute_variety(self):
+        """Agregações por variedade de uva (somente leitura, sem I/O)"""
         # Top variedades por volume
-        top_varieties = self.wine_data['variety'].value_counts().head(15)
-        print("\n🍇 TOP 15 VARIEDADES MAIS AVALIADAS:")
-        for i, (variety, count) in enumerate(top_varieties.items(), 1):
-            print(f"{i:2d}. {variety}: {count:,} avaliações")
+        top_varieties = self.variety_counts.head(15)
+        
+        # Máscara das top variedades testada sobre os códigos inteiros do Categorical
+        variety = self.wine_data['variety']
+        top_codes = variety.cat.categories.get_indexer(top_varieties.index)
+        sub = self.wine_data[np.isin(variety.cat.codes.to_numpy(), top_codes)]
         
         # Análise de preço e qualidade por variedade
-        variety_analysis = self.wine_data[self.wine_data['variety'].isin(top_varieties.index)].groupby('variety').agg({
+        variety_analysis = sub.groupby('variety', observed=True).agg({
             'points': ['mean', 'std'],
             'price': ['mean', 'median'],
             'variety': 'count'
-        }).round(2)
+        }).pipe(round_aggregates)
         
         variety_analysis.columns = ['Pontuação_Média', 'Pontuação_Desvio', 
                                    'Preço_Médio', 'Preço_Mediano', 'Quantidade']
@@ -159,6 +280,23 @@ class WineTrendsAnalyzer:
         
         variety_analysis = variety_analysis.sort_values('Custo_Benefício')
         
+        return {'top_varieties': top_varieties, 'variety_analysis': variety_analysis}
+    
+    def analyze_variety_trends(self, results=None):
+        """Analisa tendências por variedade de uva"""
+        if results is None:
+            results = self._compute_variety()
+        top_varieties = results['top_varieties']
+        variety_analysis = results['variety_analysis']
+        
+        print("\n" + "="*60)
+        print("ANÁLISE: TENDÊNCIAS POR VARIEDADE DE UVA")
+        print("="*60)
+        
+        print("\n🍇 TOP 15 VARIEDADES MAIS AVALIADAS:")
+        for i, (variety, count) in enumerate(top_varieties.items(), 1):
+            print(f"{i:2d}. {variety}: {count:,} avaliações")
+        
         print("\n💰 RANKING DE CUSTO-BENEFÍCIO (menor = melhor):")
         print(variety_analysis[['Pontuação_Média', 'Preço_Médio', 'Custo_Benefício']].head(10))
         
@@ -185,35 +323,45 @@ class WineTrendsAnalyzer:
         ax2.set_xticklabels(best_value.index, rotation=45, ha='right')
         
         plt.tight_layout()
-        plt.savefig('analise_variedades.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        fig.savefig('analise_variedades.png', dpi=SAVE_DPI, bbox_inches='tight')
+        plt.close(fig)
         
         return variety_analysis
     
-    def analyze_regional_preferences(self):
-        """Analisa preferências regionais"""
-        print("\n" + "="*60)
-        print("ANÁLISE: PREFERÊNCIAS REGIONAIS")
-        print("="*60)
-        
+    def _compute_country(self):
+        """Agregações por país produtor (somente leitura, sem I/O)"""
         # Top países produtores
-        top_countries = self.wine_data['country'].value_counts().head(15)
-        print("\n🌍 TOP 15 PAÍSES PRODUTORES:")
-        for i, (country, count) in enumerate(top_countries.items(), 1):
-            print(f"{i:2d}. {country}: {count:,} vinhos")
+        top_countries = self.country_counts.head(15)
         
         # Análise por país
-        country_analysis = self.wine_data[self.wine_data['country'].isin(top_countries.index)].groupby('country').agg({
+        country_analysis = self._by_country[self._by_country['country'].isin(top_countries.index)].groupby('country', sort=False, observed=True).agg({
             'points': ['mean', 'std'],
             'price': ['mean', 'median'],
             'country': 'count'
-        }).round(2)
+        }).pipe(round_aggregates)
         
         country_analysis.columns = ['Pontuação_Média', 'Pontuação_Desvio', 
                                    'Preço_Médio', 'Preço_Mediano', 'Quantidade']
         
         country_analysis = country_analysis.sort_values('Pontuação_Média', ascending=False)
         
+        return {'top_countries': top_countries, 'country_analysis': country_analysis}
+    
+    def analyze_regional_preferences(self, results=None):
+        """Analisa preferências regionais"""
+        if results is None:
+            results = self._compute_country()
+        top_countries = results['top_countries']
+        country_analysis = results['country_analysis']
+        
+        print("\n" + "="*60)
+        print("ANÁLISE: PREFERÊNCIAS REGIONAIS")
+        print("="*60)
+        
+        print("\n🌍 TOP 15 PAÍSES PRODUTORES:")
+        for i, (country, count) in enumerate(top_countries.items(), 1):
+            print(f"{i:2d}. {country}: {count:,} vinhos")
+        
         print("\n🏆 TOP 10 PAÍSES POR QUALIDADE MÉDIA:")
         print(country_analysis[['Pontuação_Média', 'Preço_Médio', 'Quantidade']].head(10))
         
@@ -235,17 +383,21 @@ class WineTrendsAnalyzer:
         print("TENDÊNCIAS DE COMPRA IDENTIFICADAS")
         print("="*60)
         
+        n = len(self.wine_data)
+        
         # 1. Sweet Spot de preço-qualidade
         sweet_spot = self.wine_data[
             (self.wine_data['points'] >= 88) & 
             (self.wine_data['price'] <= 30)
         ]
         
+        n_sweet_spot = len(sweet_spot)
+        
         print(f"\n🎯 SWEET SPOT (Pontuação ≥88, Preço ≤$30):")
-        print(f"Quantidade de vinhos: {len(sweet_spot):,}")
-        print(f"Percentual do total: {len(sweet_spot)/len(self.wine_data)*100:.1f}%")
+        print(f"Quantidade de vinhos: {n_sweet_spot:,}")
+        print(f"Percentual do total: {n_sweet_spot / n * 100:.1f}%")
         
-        if len(sweet_spot) > 0:
+        if n_sweet_spot > 0:
             print(f"Pontuação média: {sweet_spot['points'].mean():.1f}")
             print(f"Preço médio: US$ {sweet_spot['price'].mean():.2f}")
             
@@ -256,32 +408,48 @@ class WineTrendsAnalyzer:
         
         # 2. Vinhos premium com melhor custo-benefício
         premium_wines = self.wine_data[self.wine_data['points'] >= 90]
-        premium_value = premium_wines.copy()
-        premium_value['value_score'] = premium_value['points'] / premium_value['price']
-        best_premium = premium_value.nlargest(10, 'value_score')
+        scores = premium_wines['points'].to_numpy() / premium_wines['price'].to_numpy()
+        k = min(10, len(scores))
+        # Seleção O(n) dos 10 maiores; empates no corte ficam com os primeiros, como no nlargest
+        kth_score = -np.partition(-scores, k - 1)[k - 1] if k else np.inf
+        above = np.flatnonzero(scores > kth_score)
+        ties = np.flatnonzero(scores == kth_score)[:k - len(above)]
+        top_idx = np.concatenate([above, ties])
+        top_idx = top_idx[np.lexsort((top_idx, -scores[top_idx]))]
+        best_premium = premium_wines.iloc[top_idx].assign(value_score=scores[top_idx])
         
         print(f"\n💎 VINHOS PREMIUM COM MELHOR CUSTO-BENEFÍCIO (Pontuação ≥90):")
-        for idx, wine in best_premium.iterrows():
-            print(f"  • {wine['title'][:50]}...")
-            print(f"    Pontuação: {wine['points']}, Preço: US$ {wine['price']:.2f}, Valor: {wine['value_score']:.3f}")
+        for wine in best_premium[['title', 'points', 'price', 'value_score']].itertuples(index=False):
+            print(f"  • {wine.title[:50]}...")
+            print(f"    Pontuação: {wine.points}, Preço: US$ {wine.price:.2f}, Valor: {wine.value_score:.3f}")
         
         # 3. Tendências por faixa de preço
         print(f"\n📊 DISTRIBUIÇÃO POR CATEGORIA DE PREÇO:")
         price_dist = self.wine_data['price_category'].value_counts()
-        for category, count in price_dist.items():
-            percentage = count / len(self.wine_data) * 100
+        percentages = price_dist.to_numpy() / n * 100
+        for category, count, percentage in zip(price_dist.index, price_dist.to_numpy(), percentages):
             print(f"  • {category}: {count:,} vinhos ({percentage:.1f}%)")
         
         # 4. Correlações interessantes
         print(f"\n🔍 CORRELAÇÕES DESCOBERTAS:")
         
         # Correlação pontuação-preço por país
-        correlations = []
-        for country in self.wine_data['country'].value_counts().head(10).index:
-            country_data = self.wine_data[self.wine_data['country'] == country]
-            if len(country_data) > 50:  # Mínimo de dados para correlação confiável
-                corr = country_data['price'].corr(country_data['points'])
-                correlations.append((country, corr, len(country_data)))
+        top_countries = self.country_counts.head(10)
+        top_countries = top_countries[top_countries > 50]  # Mínimo de dados para correlação confiável
+        # Pearson r a partir de somas por grupo sobre desvios em relação à média do país:
+        # centrar antes de somar evita o cancelamento da fórmula n·Σxy − Σx·Σy
+        sub = self._by_country[self._by_country['country'].isin(top_countries.index)]
+        frame = sub[['country']].assign(x=sub['price'].astype(np.float64),
+                                        y=sub['points'].astype(np.float64))
+        by_country = frame.groupby('country', sort=False, observed=True)
+        dx = frame['x'] - by_country['x'].transform('mean')
+        dy = frame['y'] - by_country['y'].transform('mean')
+        g = (frame[['country']].assign(xx=dx * dx, yy=dy * dy, xy=dx * dy)
+             .groupby('country', sort=False, observed=True)
+             .sum())
+        country_corr = g['xy'] / np.sqrt(g['xx'] * g['yy'])
+        correlations = [(country, country_corr[country], int(count))
+                        for country, count in top_countries.items()]
         
         correlations.sort(key=lambda x: x[1], reverse=True)
         
@@ -328,10 +496,20 @@ class WineTrendsAnalyzer:
         if not self.load_data():
             return
         
-        # Executar todas as análises
-        correlation, price_analysis = self.analyze_price_quality_relationship()
-        variety_analysis = self.analyze_variety_trends()
-        country_analysis = self.analyze_regional_preferences()
+        # As três agregações só leem self.wine_data e passam a maior parte do tempo
+        # em código C do pandas/NumPy (que libera o GIL): rodam em paralelo
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = {
+                'price': executor.submit(self._compute_price_quality),
+                'variety': executor.submit(self._compute_variety),
+                'country': executor.submit(self._compute_country)
+            }
+            computed = {key: future.result() for key, future in futures.items()}
+        
+        # Impressão e gráficos em sequência (matplotlib não é thread-safe)
+        correlation, price_analysis = self.analyze_price_quality_relationship(computed['price'])
+        variety_analysis = self.analyze_variety_trends(computed['variety'])
+        country_analysis = self.analyze_regional_preferences(computed['country'])
         trends_data = self.identify_purchase_trends()
         self.generate_recommendations(trends_data)
         